@@ -20,6 +20,7 @@ from bpy.types import (NodeSocket,
 
 from .channel import Channel
 from .utils.image import (SplitChannelImageRGB,
+                          copy_image,
                           create_image_copy,
                           delete_image_and_files)
 from .utils.nodes import is_socket_simple
@@ -804,10 +805,16 @@ class LayerBaker(LayerStackBaker):
 
 
 def apply_node_mask_bake(layer,
-                         samples: int) -> bpy.types.Image:
+                         samples: int,
+                         out_buffer=None) -> Optional[bpy.types.Image]:
     """Bake a layer's node_mask multiplied with the layer's painted
     alpha. Returns an Image that can used to replace the layer's
     current alpha image.
+    If out_buffer is given then the baked pixels are instead written
+    to it (using foreach_get) and the baked image is deleted straight
+    away, in which case None is returned. out_buffer should be an array
+    of floats the same length as the pixels of the layer stack's
+    images.
     """
     layer_stack = layer.layer_stack
 
@@ -842,14 +849,33 @@ def apply_node_mask_bake(layer,
     finally:
         layer.opacity = old_opacity
 
+    # N.B. The bake can't target the layer's own (or active) image
+    # directly since the baked socket reads from that image and Blender
+    # refuses to bake an image into itself (circular dependency), so
+    # the pixels are copied from a temporary image instead.
     image = baked.b_image
+
+    if out_buffer is not None:
+        try:
+            if len(image.pixels) != len(out_buffer):
+                raise ValueError("out_buffer has the wrong length.")
+            image.pixels.foreach_get(out_buffer)
+        finally:
+            bpy.data.images.remove(image)
+        return None
+
     image.name = f"{layer.name} Node Mask"
     return image
 
 
-def bake_node_mask_to_image(layer, samples: int = 0) -> bpy.types.Image:
+def bake_node_mask_to_image(layer, samples: int = 0,
+                            target_image: Optional[bpy.types.Image] = None
+                            ) -> bpy.types.Image:
     """Bakes a node mask to an image. If samples is 0 the value of
     bake_samples in the layer stack's image manager will be used.
+    If target_image is given and has the same size and pixel format as
+    the bake then the baked pixels are copied into target_image (which
+    is returned) rather than returning a new image.
     """
     layer_stack = layer.layer_stack
     im = layer_stack.image_manager
@@ -875,6 +901,17 @@ def bake_node_mask_to_image(layer, samples: int = 0) -> bpy.types.Image:
     baked = next(baker.bake_sockets((mask_node.outputs[0],)))
 
     image = baked.b_image
+
+    if (target_image is not None
+            and tuple(target_image.size) == tuple(image.size)
+            and target_image.is_float == image.is_float
+            and target_image.source == 'GENERATED'):
+        try:
+            copy_image(image, target_image)
+        finally:
+            bpy.data.images.remove(image)
+        return target_image
+
     image.name = f"{layer.name} Node Mask"
 
     return image
@@ -538,7 +538,7 @@ PREVIEW_MODIFIERS = (
                     "PML Heatmap Factor",
                     channel_types={'FLOAT', 'FLOAT_FACTOR'}),
 )
-PREVIEW_MODIFIERS_ENUM = [x.to_enum_tuple() for x in PREVIEW_MODIFIERS]
+PREVIEW_MODIFIERS_ENUM = tuple(x.to_enum_tuple() for x in PREVIEW_MODIFIERS)
 
 
 def preview_modifier_from_enum(enum: str) -> PreviewModifier:
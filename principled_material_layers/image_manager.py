@@ -711,16 +711,22 @@ class ImageManager(bpy.types.PropertyGroup):
             key=self.path_resolve("active_image_change", False))
 
     def _set_active_layer(self,
-                          new_layer: MaterialLayer) -> None:
-        """Changes the active layer from old_layer to new_layer"""
+                          new_layer: MaterialLayer) -> bool:
+        """Changes the active layer from old_layer to new_layer.
+        Returns True if any images may have been created, deleted or
+        modified.
+        """
 
         # The currently active layer
         old_layer = self.active_layer
 
+        # A temporary active image will be deleted
+        images_modified = self._is_using_tmp_active_image
+
         if (old_layer is not None
                 and old_layer.has_image
                 and old_layer.has_shared_image
-                and self._is_using_tmp_active_image):
+                and images_modified):
 
             copy_image_channel(self.active_image,
                                0,
@@ -731,25 +737,36 @@ class ImageManager(bpy.types.PropertyGroup):
                 and old_layer is not None
                 and old_layer.has_image):
             self.update_tiled_storage((old_layer.image,))
+            images_modified = True
 
         self._replace_active_image(new_layer, old_layer)
 
-    def set_active_layer(self, layer: MaterialLayer) -> None:
+        # A temporary active image will have been created
+        if new_layer.uses_image and new_layer.has_shared_image:
+            images_modified = True
+
+        return images_modified
+
+    def set_active_layer(self, layer: MaterialLayer) -> bool:
         """Sets the active layer. This will also set the active_image
         property to an appropriate value for the layer.
         If currently using a temp active image then its data will be
         written back to the previous active layer.
+        Returns True if any images may have been created, deleted or
+        modified in the process.
         """
         # The identifier of the currently active layer
         current_id = self["active_layer_id"]
 
         if layer.identifier == current_id:
-            return
+            return False
 
-        self._set_active_layer(layer)
+        images_modified = self._set_active_layer(layer)
 
         self["active_layer_id"] = layer.identifier
 
+        return images_modified
+
     def set_paint_canvas(self, context=None) -> None:
         """Sets the image paint canvas based on this image_manager's
         active layer.
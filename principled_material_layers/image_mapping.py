@@ -27,14 +27,17 @@ def _get_shader_node_proj_enum():
     return [(x.identifier, x.name, x.description) for x in prop.enum_items]
 
 
-IMG_PROJ_MODES += _get_shader_node_proj_enum()
+IMG_PROJ_MODES = tuple(IMG_PROJ_MODES + _get_shader_node_proj_enum())
+
+# Set of the enum strings of IMG_PROJ_MODES
+_IMG_PROJ_MODE_IDS = frozenset(x[0] for x in IMG_PROJ_MODES)
 
 
 def set_layer_projection(layer, proj_mode: str) -> None:
     """Changes the projection of any Image Texture nodes
     in layer's material
     """
-    if proj_mode not in next(zip(*IMG_PROJ_MODES)):
+    if proj_mode not in _IMG_PROJ_MODE_IDS:
         raise ValueError(f"Unsupported projection mode '{proj_mode}'")
 
     node_tree = layer.node_tree
@@ -423,20 +423,23 @@ class LayerStack(bpy.types.PropertyGroup):
         for callback, args in self._rna_resub_callbacks.values():
             callback(*args)
 
-    def set_active_layer_index(self, value):
-        """Sets self.active_layer_index without calling an operator."""
+    def set_active_layer_index(self, value) -> bool:
+        """Sets self.active_layer_index without calling an operator.
+        Returns True if any images may have been created, deleted or
+        modified by the change (e.g. when layers share images).
+        """
 
         if self.active_layer_index == value:
             if self._is_active_in_image_paint:
                 self.image_manager.set_paint_canvas()
-            return
+            return False
 
         if value < 0 or value >= len(self.layers):
             raise IndexError("Index out of range")
 
         self["_active_layer_index"] = value
 
-        self._active_layer_changed()
+        return self._active_layer_changed()
 
     def _set_active_layer_index_op(self, value):
         """Sets self.active_layer_index using an operator (to allow for
@@ -583,18 +586,24 @@ class LayerStack(bpy.types.PropertyGroup):
 
         bpy.app.timers.register(self._undo_workaround_function)
 
-    def _active_layer_changed(self):
+    def _active_layer_changed(self) -> bool:
+        """Updates the image and node managers after the active layer
+        has changed. Returns True if any images may have been modified.
+        """
         if not self.is_initialized:
-            return
+            return False
 
         layer = self.active_layer
+        images_modified = False
 
         if layer is not None:
-            self.image_manager.set_active_layer(layer)
+            images_modified = self.image_manager.set_active_layer(layer)
             self.node_manager.set_active_layer(layer)
 
         self.image_manager.set_paint_canvas()
 
+        return images_modified
+
     def _update_layer_tiled_storage(self, layer_id: str) -> None:
         pre_undo_layer = self.get_layer_by_id(layer_id)
         if pre_undo_layer:
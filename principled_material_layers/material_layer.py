@@ -400,6 +400,27 @@ class MaterialLayer(PropertyGroup):
 
         return added
 
+    def can_remove_channel(self,
+                           channel_name: Union[str, BasicChannel]
+                           ) -> typing.Tuple[bool, str]:
+        """Checks whether remove_channel can be called with channel_name
+        without making any changes to the layer.
+        Returns:
+            A tuple (can_remove, reason). reason is a message explaining
+            why the channel can't be removed or "" if it can.
+        """
+        if isinstance(channel_name, BasicChannel):
+            channel_name = channel_name.name
+        elif not isinstance(channel_name, str):
+            return False, "Expected channel name to be a Channel or a str"
+
+        channels = self.channels
+        if channel_name not in channels:
+            return False, f"Channel {channel_name} not found in layer"
+        if len(channels) == 1:
+            return False, "Cannot have a layer with no channels"
+        return True, ""
+
     def remove_channel(self,
                        channel_name: Union[str, BasicChannel],
                        keep_sockets: bool = True) -> None:
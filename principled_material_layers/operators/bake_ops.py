@@ -32,6 +32,7 @@ from ..utils.layer_stack_utils import get_layer_stack
 from ..utils.ops import (WMProgress,
                          ensure_global_undo,
                          pml_op_poll,
+                         pml_op_poll_layer_stack,
                          save_all_modified)
 
 
@@ -314,9 +315,10 @@ class PML_OT_bake_layer(Operator):
 
     @classmethod
     def poll(cls, context):
-        if not pml_op_poll(context):
+        layer_stack = pml_op_poll_layer_stack(context)
+        if layer_stack is None:
             return False
-        im = get_layer_stack(context).image_manager
+        im = layer_stack.image_manager
 
         if im.uses_tiled_images and bpy.app.version < (3, 2, 0):
             cls.poll_message_set("Tiled image baking requires Blender 3.2+")
@@ -463,9 +465,10 @@ class PML_OT_bake_layer_stack(Operator):
 
     @classmethod
     def poll(cls, context):
-        if not pml_op_poll(context):
+        layer_stack = pml_op_poll_layer_stack(context)
+        if layer_stack is None:
             return False
-        im = get_layer_stack(context).image_manager
+        im = layer_stack.image_manager
 
         if im.uses_tiled_images and bpy.app.version < (3, 2, 0):
             cls.poll_message_set("Tiled image baking requires Blender 3.2+")
@@ -584,8 +587,8 @@ class PML_OT_free_layer_stack_bake(Operator):
 
     @classmethod
     def poll(cls, context):
-        return (pml_op_poll(context)
-                and get_layer_stack(context).is_baked)
+        layer_stack = pml_op_poll_layer_stack(context)
+        return layer_stack is not None and layer_stack.is_baked
 
     def execute(self, context):
         save_all_modified()
@@ -608,9 +611,10 @@ class PML_OT_bake_layers_below(Operator):
 
     @classmethod
     def poll(cls, context):
-        if not pml_op_poll(context):
+        layer_stack = pml_op_poll_layer_stack(context)
+        if layer_stack is None:
             return False
-        active_layer = get_layer_stack(context).active_layer
+        active_layer = layer_stack.active_layer
         if active_layer is None:
             return False
         if active_layer.is_base_layer:
@@ -14,7 +14,7 @@ from .. import utils
 from ..material_layer import NODE_MASK_PREVIEW_STR
 from ..pml_node import get_pml_nodes
 from ..utils.layer_stack_utils import get_layer_stack
-from ..utils.ops import pml_op_poll
+from ..utils.ops import pml_op_poll, pml_op_poll_layer_stack
 from ..utils.node_tree import get_node_tree_sockets
 
 # The name of the Group node used for previewing layer channels
@@ -145,9 +145,10 @@ class PML_OT_copy_hardness_to_all(Operator):
 
     @classmethod
     def poll(cls, context):
-        if not pml_op_poll(context):
+        layer_stack = pml_op_poll_layer_stack(context)
+        if layer_stack is None:
             return False
-        active_layer = get_layer_stack(context).active_layer
+        active_layer = layer_stack.active_layer
         return (active_layer is not None
                 and active_layer.active_channel is not None)
 
@@ -188,9 +189,9 @@ class PML_OT_copy_hardness_to_all_ls(Operator):
 
     @classmethod
     def poll(cls, context):
-        if not pml_op_poll(context):
-            return False
-        return get_layer_stack(context).active_channel is not None
+        layer_stack = pml_op_poll_layer_stack(context)
+        return (layer_stack is not None
+                and layer_stack.active_channel is not None)
 
     def execute(self, context):
         layer_stack = get_layer_stack(context)
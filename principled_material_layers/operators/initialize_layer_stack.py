@@ -22,7 +22,10 @@ from ..pml_node import get_pml_nodes_from
 
 from ..utils.image import can_pack_udims
 from ..utils.nodes import reference_inputs
-from ..utils.ops import pml_op_poll, pml_is_supported_editor, save_all_modified
+from ..utils.ops import (pml_op_poll,
+                         pml_op_poll_layer_stack,
+                         pml_is_supported_editor,
+                         save_all_modified)
 from ..utils.layer_stack_utils import get_layer_stack
 
 
@@ -458,9 +461,10 @@ class PML_OT_apply_layer_stack(Operator):
 
     @classmethod
     def poll(cls, context):
-        if not pml_op_poll(context):
+        layer_stack = pml_op_poll_layer_stack(context)
+        if layer_stack is None:
             return False
-        if not get_layer_stack(context).is_baked:
+        if not layer_stack.is_baked:
             cls.poll_message_set("The layer stack must be baked first")
             return False
         return True
@@ -15,15 +15,26 @@ from ..bake import apply_node_mask_bake, bake_node_mask_to_image
 from ..channel import SOCKET_TYPES
 from ..material_layer import LAYER_TYPES
 
-from ..utils.image import copy_image
+from ..utils.image import new_pixel_array
 from ..utils.layer_stack_utils import get_layer_stack, get_layer_stack_by_id
 from ..utils.naming import suffix_num_unique_in
 from ..utils.nodes import get_nodes_by_type
 from ..utils.node_tree import new_node_tree_socket
-from ..utils.ops import ensure_global_undo, pml_op_poll, save_all_modified
+from ..utils.ops import (ensure_global_undo,
+                         pml_op_poll,
+                         pml_op_poll_layer_stack,
+                         save_all_modified)
 
 from . import channel_ops
 
+# Maps each layer type to a different layer type (the default type to
+# convert to in pml_convert_layer)
+_OTHER_LAYER_TYPE = {t[0]: next(u[0] for u in LAYER_TYPES if u[0] != t[0])
+                     for t in LAYER_TYPES}
+
+# If True then there is only one possible type to convert a layer to
+_LAYER_TYPES_BINARY = len(LAYER_TYPES) == 2
+
 
 class PML_OT_set_active_layer_index(Operator):
     bl_idname = "material.pml_set_active_layer_index"
@@ -47,11 +58,11 @@ class PML_OT_set_active_layer_index(Operator):
         # Save all modified images to help prevent issues with undo
         save_all_modified()
 
-        layer_stack.set_active_layer_index(self.layer_index)
-
-        # Save all modified again (since set_active_layer_index may
-        # have modified images)
-        save_all_modified()
+        # set_active_layer_index returns True if it may have written
+        # to, created or deleted images (e.g. when layers share images)
+        if layer_stack.set_active_layer_index(self.layer_index):
+            # Save all modified again
+            save_all_modified()
 
         ensure_global_undo()
 
@@ -201,9 +212,10 @@ class PML_OT_remove_layer(Operator):
 
     @classmethod
     def poll(cls, context):
-        if not pml_op_poll(context):
+        layer_stack = pml_op_poll_layer_stack(context)
+        if layer_stack is None:
             return False
-        active_layer = get_layer_stack(context).active_layer
+        active_layer = layer_stack.active_layer
         return active_layer is not None and not active_layer.is_base_layer
 
     def execute(self, context):
@@ -225,18 +237,30 @@ class MoveLayerBase(Operator):
 
     @classmethod
     def poll(cls, context):
-        if not pml_op_poll(context):
+        layer_stack = pml_op_poll_layer_stack(context)
+        if layer_stack is None:
             return False
-        layer_stack = get_layer_stack(context)
         active_layer = layer_stack.active_layer
 
         if active_layer is None:
             return False
-        if active_layer.is_base_layer:
+
+        layer_id = active_layer.identifier
+        if layer_id and layer_id == layer_stack.base_layer_id:
             cls.poll_message_set("Cannot move the base layer")
             return False
-        if cls.direction == 'UP' and active_layer == layer_stack.top_layer:
-            return False
+
+        if not active_layer.parent:
+            # For top level layers a single lookup of the layer's index
+            # is enough, since the base layer is always at index 0.
+            top_level_refs = layer_stack.top_level_layers_ref
+            index = top_level_refs.find(layer_id)
+            if index < 0:
+                return False
+            if cls.direction == 'UP':
+                return index < len(top_level_refs) - 1
+            return index > 1
+
         if cls.direction == 'DOWN':
             layer_below = active_layer.get_layer_below()
             if not layer_below or layer_below.is_base_layer:
@@ -283,9 +307,10 @@ class PML_OT_new_node_mask(Operator):
 
     @classmethod
     def poll(cls, context):
-        if not pml_op_poll(context):
+        layer_stack = pml_op_poll_layer_stack(context)
+        if layer_stack is None:
             return False
-        active_layer = get_layer_stack(context).active_layer
+        active_layer = layer_stack.active_layer
         if not active_layer:
             return False
         if active_layer.is_base_layer:
@@ -368,9 +393,9 @@ class PML_OT_apply_node_mask(Operator):
 
     @classmethod
     def poll(cls, context):
-        if not pml_op_poll(context):
+        layer_stack = pml_op_poll_layer_stack(context)
+        if layer_stack is None:
             return False
-        layer_stack = get_layer_stack(context)
         active_layer = layer_stack.active_layer
         if not active_layer:
             return False
@@ -398,22 +423,27 @@ class PML_OT_apply_node_mask(Operator):
         active_layer = layer_stack.active_layer
         im = layer_stack.image_manager
 
-        if not context.selected_objects:
+        # Check the active object first to avoid building the list of
+        # selected objects in the usual case
+        active_object = context.active_object
+        if not ((active_object is not None and active_object.select_get())
+                or context.selected_objects):
             self.report({'WARNING'}, "No objects are selected for baking")
             return {'CANCELLED'}
 
         save_all_modified()
 
-        image = apply_node_mask_bake(active_layer, self.samples)
+        # Bake straight into a pixel buffer so that the baked image can
+        # be freed before the layer is converted.
+        pixels = new_pixel_array(im.image_width * im.image_height * 4)
+        apply_node_mask_bake(active_layer, self.samples, out_buffer=pixels)
 
-        try:
-            if active_layer.layer_type != 'MATERIAL_PAINT':
-                layer_stack.convert_layer(active_layer, 'MATERIAL_PAINT')
-
-            copy_image(image, im.active_image)
+        if active_layer.layer_type != 'MATERIAL_PAINT':
+            layer_stack.convert_layer(active_layer, 'MATERIAL_PAINT')
 
-        finally:
-            bpy.data.images.remove(image)
+        active_image = im.active_image
+        active_image.pixels.foreach_set(pixels)
+        active_image.update()
 
         if not self.keep_node_mask:
             active_layer.node_mask = None
@@ -442,9 +472,9 @@ class PML_OT_node_mask_to_stencil(Operator):
 
     @classmethod
     def poll(cls, context):
-        if not pml_op_poll(context):
+        layer_stack = pml_op_poll_layer_stack(context)
+        if layer_stack is None:
             return False
-        layer_stack = get_layer_stack(context)
         active_layer = layer_stack.active_layer
 
         if layer_stack.image_manager.uses_tiled_images:
@@ -458,13 +488,16 @@ class PML_OT_node_mask_to_stencil(Operator):
         layer_stack = get_layer_stack(context)
         active_layer = layer_stack.active_layer
 
-        baked_image = bake_node_mask_to_image(active_layer)
-
         existing = bpy.data.images.get(self.MASK_IMAGE_NAME)
-        if existing is not None:
-            bpy.data.images.remove(existing)
 
-        baked_image.name = self.MASK_IMAGE_NAME
+        # Bakes into existing if it has a compatible size and format
+        baked_image = bake_node_mask_to_image(active_layer,
+                                              target_image=existing)
+
+        if baked_image != existing:
+            if existing is not None:
+                bpy.data.images.remove(existing)
+            baked_image.name = self.MASK_IMAGE_NAME
 
         self.set_as_stencil_mask(baked_image, context)
 
@@ -497,9 +530,10 @@ class PML_OT_convert_layer(Operator):
 
     @classmethod
     def poll(cls, context):
-        if not pml_op_poll(context):
+        layer_stack = pml_op_poll_layer_stack(context)
+        if layer_stack is None:
             return False
-        active_layer = get_layer_stack(context).active_layer
+        active_layer = layer_stack.active_layer
         if active_layer is None:
             cls.poll_message_set("No active layer")
             return False
@@ -512,7 +546,7 @@ class PML_OT_convert_layer(Operator):
         layout = self.layout
         row = layout.row()
         row.prop(self, "new_type")
-        if len(LAYER_TYPES) == 2:
+        if _LAYER_TYPES_BINARY:
             row.enabled = False
         if self.new_type != 'MATERIAL_PAINT':
             layout.prop(self, "keep_image")
@@ -539,8 +573,7 @@ class PML_OT_convert_layer(Operator):
         active_layer = get_layer_stack(context).active_layer
 
         # Set to a value different from the layer's current type
-        self.new_type = next(x[0] for x in LAYER_TYPES
-                             if x[0] != active_layer.layer_type)
+        self.new_type = _OTHER_LAYER_TYPE[active_layer.layer_type]
 
         wm = context.window_manager
         return wm.invoke_props_dialog(self)
@@ -565,8 +598,8 @@ class PML_OT_layer_img_projection(Operator):
 
     @classmethod
     def poll(cls, context):
-        return (pml_op_poll(context)
-                and get_layer_stack(context).active_layer is not None)
+        layer_stack = pml_op_poll_layer_stack(context)
+        return layer_stack is not None and layer_stack.active_layer is not None
 
     def execute(self, context):
         active_layer = get_layer_stack(context).active_layer
@@ -648,16 +681,15 @@ class PML_OT_layer_remove_channel(Operator):
         layer_stack = get_layer_stack(context)
         active_layer = layer_stack.active_layer
 
-        if len(active_layer.channels) == 1:
-            self.report({'WARNING'}, "Cannot have a layer with no channels.")
+        can_remove, reason = active_layer.can_remove_channel(
+                                self.channel_name)
+        if not can_remove:
+            self.report({'WARNING'}, f"Could not remove {self.channel_name} "
+                                     f"from layer {active_layer.name}: "
+                                     f"{reason}.")
             return {'CANCELLED'}
 
-        try:
-            active_layer.remove_channel(self.channel_name)
-        except (ValueError, RuntimeError) as e:
-            self.report({'ERROR'}, f"Could not remove {self.channel_name} "
-                                   f"from layer {active_layer.name}: {e}.")
-            return {'CANCELLED'}
+        active_layer.remove_channel(self.channel_name)
 
         layer_stack.node_manager.rebuild_node_tree()
         return {'FINISHED'}
@@ -705,6 +737,9 @@ class PML_OT_stack_add_channel(Operator):
 
         layer_stack.active_channel = ch
 
+        # N.B. This doesn't modify any images but unsaved paint strokes
+        # would be lost when undoing the global undo step pushed here.
+        # save_all_modified returns early if no images are dirty.
         save_all_modified()
         ensure_global_undo()
         return {'FINISHED'}
@@ -732,10 +767,9 @@ class PML_OT_stack_remove_channel(Operator):
 
     @classmethod
     def poll(cls, context):
-        if not pml_op_poll(context):
+        layer_stack = pml_op_poll_layer_stack(context)
+        if layer_stack is None:
             return False
-
-        layer_stack = get_layer_stack(context)
         # Layer stacks with no channels are not supported
         return len(layer_stack.channels) > 1
 
@@ -747,6 +781,7 @@ class PML_OT_stack_remove_channel(Operator):
             self.report({'ERROR'}, str(e))
             return {'CANCELLED'}
 
+        # Needed before the global undo step (see pml_stack_add_channel)
         save_all_modified()
         ensure_global_undo()
         return {'FINISHED'}
@@ -819,12 +854,13 @@ class PML_OT_resubscribe_msgbus(Operator):
             return {'FINISHED'}
 
         # Resubscribe RNA for any ShaderNodePMLStack of the layer_stack
-        pml_nodes = list(get_nodes_by_type(material.node_tree,
-                                           "ShaderNodePMLStack"))
-        for node in pml_nodes:
+        num_nodes = 0
+        for node in get_nodes_by_type(material.node_tree,
+                                      "ShaderNodePMLStack"):
             node.reregister_msgbus()
+            num_nodes += 1
         self.report({'INFO'}, f"Resubscribed {material.name}'s layer stack "
-                              f"and {len(pml_nodes)} node(s)")
+                              f"and {num_nodes} node(s)")
         return {'FINISHED'}
 
 
@@ -840,11 +876,10 @@ class PML_OT_reload_active_layer(Operator):
 
     @classmethod
     def poll(cls, context):
-        active_layer = get_layer_stack(context).active_layer
-        if not pml_op_poll(context):
+        layer_stack = pml_op_poll_layer_stack(context)
+        if layer_stack is None:
             return False
-
-        active_layer = get_layer_stack(context).active_layer
+        active_layer = layer_stack.active_layer
         return active_layer is not None and active_layer.has_shared_image
 
     def execute(self, context):
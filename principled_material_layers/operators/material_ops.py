@@ -3,7 +3,7 @@
 import warnings
 
 from contextlib import ExitStack
-from typing import (Any, Callable, Container, Dict, List, NamedTuple,
+from typing import (Any, Callable, Container, Dict, List,
                     Optional, Tuple, Union)
 
 import bpy
@@ -33,8 +33,11 @@ from ..channel import BasicChannel
 
 from ..utils.duplicate_node_tree import duplicate_node_tree
 from ..utils.layer_stack_utils import get_layer_stack
-from ..utils.materials import (check_material_compat,
-                               remove_appended_material)
+from ..utils.materials import (add_material_cache,
+                               check_material_compat,
+                               get_cached_asset_compat,
+                               remove_appended_material,
+                               remove_material_cache)
 from ..utils.nodes import (delete_nodes_not_in,
                            get_node_by_type,
                            get_output_node,
@@ -42,7 +45,7 @@ from ..utils.nodes import (delete_nodes_not_in,
                            reference_inputs,
                            vector_socket_link_default_generic)
 from ..utils.node_tree import (clear_node_tree_sockets,
-                               get_node_tree_socket,
+                               get_node_tree_sockets,
                                new_node_tree_socket,
                                sort_outputs_by)
 from ..utils.ops import pml_op_poll
@@ -65,23 +68,38 @@ CHANNEL_DETECT_MODES = (
 
 
 def _temp_switch_to_node_editor(context, exit_stack, node_tree) -> None:
-    old_area_type = context.area.type
-    exit_stack.callback(lambda: setattr(context.area, "type",
-                                        old_area_type))
-    context.area.type = 'NODE_EDITOR'
+    area = context.area
+    old_area_type = area.type
+
+    # The node editor space and the original values of any of its
+    # properties that have been changed
+    space = None
+    old_space_props = {}
+
+    def restore():
+        # Restore the space's properties before the area type since
+        # changing the area type replaces the space.
+        for name, value in reversed(list(old_space_props.items())):
+            setattr(space, name, value)
+        if area.type != old_area_type:
+            area.type = old_area_type
+
+    # Register before changing anything so that the editor is restored
+    # even if one of the changes below fails.
+    exit_stack.callback(restore)
+
+    # Only switch the area/tree type if not already a shader editor
+    if old_area_type != 'NODE_EDITOR':
+        area.type = 'NODE_EDITOR'
     space = context.space_data
 
-    old_tree_type = space.tree_type
-    exit_stack.callback(lambda: setattr(space, "tree_type",
-                                        old_tree_type))
-    space.tree_type = "ShaderNodeTree"
+    if space.tree_type != "ShaderNodeTree":
+        old_space_props["tree_type"] = space.tree_type
+        space.tree_type = "ShaderNodeTree"
 
-    old_pin = space.node_tree if space.pin else None
-    if old_pin is not None:
-        exit_stack.callback(lambda: setattr(space, "node_tree",
-                                            old_pin))
-    else:
-        exit_stack.callback(lambda: setattr(space, "pin", False))
+    old_space_props["pin"] = space.pin
+    if space.pin:
+        old_space_props["node_tree"] = space.node_tree
 
     space.pin = True
     space.node_tree = node_tree
@@ -103,8 +121,7 @@ def _duplicate_ma_node_tree(context,
             # Library materials cannot be edited so need to create
             # a copy.
             material = material.copy()
-            exit_stack.callback(lambda:
-                                bpy.data.materials.remove(material))
+            exit_stack.callback(bpy.data.materials.remove, material)
 
         node_tree = material.node_tree
 
@@ -139,21 +156,56 @@ def _duplicate_ma_node_tree(context,
 
 _SocketValueDict = Dict[str, Union[Any, NodeLink]]
 
+# Dict of (to_node name, to_socket identifier) tuples to NodeLinks
+_LinkMap = Dict[Tuple[str, str], NodeLink]
+
+
+def _build_incoming_link_map(node_tree: ShaderNodeTree) -> _LinkMap:
+    """Returns a dict mapping the node name and socket identifier of
+    each linked input socket in node_tree to the socket's first link.
+    Looking links up in this dict avoids NodeSocket.links, which has
+    to search all of the node tree's links on each access.
+    """
+    link_map = {}
+    for link in node_tree.links:
+        link_map.setdefault((link.to_node.name, link.to_socket.identifier),
+                            link)
+    return link_map
 
-class _SocketInputValue(NamedTuple):
+
+class _SocketInputValue:
     """The connection and default value of a NodeSocket. Stores link
     information using the node and socket name, so may also be used
     with a duplicated node tree.
     """
-    name: str
-    type: str
-    is_modified: bool
-    default_value: Optional[Any] = None
-    link_node_name: Optional[str] = None
-    link_socket_name: Optional[str] = None
+    # N.B. Uses __slots__ rather than a NamedTuple or dataclass since
+    # an instance is created for every visited socket (dataclass slots
+    # requires Python 3.10).
+    __slots__ = ("name", "type", "is_modified", "default_value",
+                 "link_node_name", "link_socket_name")
+
+    def __init__(self, name: str, type: str, is_modified: bool,
+                 default_value: Optional[Any] = None,
+                 link_node_name: Optional[str] = None,
+                 link_socket_name: Optional[str] = None):
+        self.name = name
+        self.type = type
+        self.is_modified = is_modified
+        self.default_value = default_value
+        self.link_node_name = link_node_name
+        self.link_socket_name = link_socket_name
+
+    def __repr__(self):
+        return (f"{type(self).__name__}(name={self.name!r}, "
+                f"type={self.type!r}, is_modified={self.is_modified})")
 
     @classmethod
-    def from_socket(cls, socket: NodeSocket, is_modified=True):
+    def from_socket(cls, socket: NodeSocket, is_modified=True,
+                    link: Optional[NodeLink] = None):
+        """Creates a _SocketInputValue from an input socket. link may
+        be given as the socket's first link (if known) to avoid using
+        socket.links.
+        """
         if socket.is_output:
             raise ValueError("Expected an input socket.")
 
@@ -165,7 +217,8 @@ class _SocketInputValue(NamedTuple):
             return cls(socket.name, socket.bl_idname,
                        is_modified, default_value)
 
-        link = socket.links[0]
+        if link is None:
+            link = socket.links[0]
         return cls(socket.name,
                    socket.bl_idname,
                    is_modified,
@@ -187,24 +240,70 @@ class _SocketInputValue(NamedTuple):
 class _ReplaceMaterialHelper:
     """A helper class for the replace_layer_material function"""
 
-    def __init__(self, layer, material):
+    def __init__(self, layer, material, layer_stack=None):
         self.layer = layer
         self.material = material
 
-        self.layer_stack = layer.layer_stack
+        self.layer_stack = (layer_stack if layer_stack is not None
+                            else layer.layer_stack)
+
+        # Names of all/enabled channels of the layer stack. N.B. These
+        # are not updated if the layer stack's channels are changed.
+        channel_names = []
+        enabled_channel_names = []
+        for ch in self.layer_stack.channels:
+            name = ch.name
+            channel_names.append(name)
+            if ch.enabled:
+                enabled_channel_names.append(name)
+
+        self._channel_names = frozenset(channel_names)
+        self._enabled_channel_names = frozenset(enabled_channel_names)
 
     def _get_surface_shader(self,
-                            output_node: bpy.types.ShaderNodeOutputMaterial
+                            output_node: bpy.types.ShaderNodeOutputMaterial,
+                            link_map: Optional[_LinkMap] = None
                             ) -> ShaderNode:
         """Returns the node connected to the surface shader socket of
-        a material output node."""
+        a material output node. link_map should be from
+        _build_incoming_link_map if given.
+        """
         socket = output_node.inputs[0]
+        if link_map is not None:
+            link = link_map.get((output_node.name, socket.identifier))
+            return None if link is None else link.from_node
+
         if not socket.is_linked:
             return None
         return socket.links[0].from_node
 
+    def is_shader_only(self, node_tree: ShaderNodeTree,
+                       output_node: Optional[ShaderNode] = None) -> bool:
+        """Returns True if the only nodes in node_tree that
+        setup_layer_node_tree would keep are unneeded i.e. node_tree
+        contains only material output nodes, group input nodes and a
+        surface shader whose inputs are all unlinked. output_node
+        should be node_tree's material output node if given.
+        """
+        if output_node is None:
+            output_node = get_output_node(node_tree)
+        if output_node is None:
+            return False
+        surface_shader = self._get_surface_shader(output_node)
+        if surface_shader is None:
+            return False
+
+        for node in node_tree.nodes:
+            if (node != surface_shader
+                    and node.bl_idname not in ("ShaderNodeOutputMaterial",
+                                               "NodeGroupInput")):
+                return False
+
+        return not any(x.is_linked for x in surface_shader.inputs)
+
     def get_channel_socket_values(self,
                                   node_tree: ShaderNodeTree,
+                                  output_node: Optional[ShaderNode] = None
                                   ) -> List[_SocketInputValue]:
         """Gets the value of each of the sockets of the node_tree
         associated with a channel from the layer stack.
@@ -213,54 +312,81 @@ class _ReplaceMaterialHelper:
         Params:
             node_tree: A material's ShaderNodeTree that should contain
                 a material output node.
+            output_node: node_tree's material output node. Found using
+                get_output_node if None.
         Returns:
             A list of _SocketInputValue instances
         """
 
-        channel_names = {ch.name for ch in self.layer_stack.channels}
+        channel_names = self._channel_names
 
         socket_values = []
 
         # Identify channels from the material output node and the
         # shader node connected to the 'Surface' socket
-        output_node = get_output_node(node_tree)
+        if output_node is None:
+            output_node = get_output_node(node_tree)
         if output_node is not None:
-            socket_values = self._socket_values(output_node, channel_names)
+            link_map = _build_incoming_link_map(node_tree)
 
-            surface_shader = self._get_surface_shader(output_node)
+            socket_values = self._socket_values(output_node, channel_names,
+                                                link_map)
+
+            surface_shader = self._get_surface_shader(output_node,
+                                                      link_map)
 
             if surface_shader is not None:
                 socket_values += self._socket_values(surface_shader,
-                                                     channel_names)
+                                                     channel_names,
+                                                     link_map)
 
         return socket_values
 
     def _socket_values(self,
                        node: ShaderNode,
                        socket_names: Container[str],
+                       link_map: Optional[_LinkMap] = None
                        ) -> List[_SocketInputValue]:
         """Returns a list of _SocketInputValue for node's inputs.
         Only values for sockets with names in socket_names are returned.
+        link_map should be from _build_incoming_link_map if given.
         """
 
         socket_values = []
 
-        # Default socket values for this node
-        ref_inputs = {x.name: x for x in reference_inputs(node)}
+        # Default socket values for this node (only for sockets that
+        # may be returned). Only found once an unlinked socket needs
+        # comparing since linked sockets always count as modified.
+        ref_inputs = None
+
+        node_name = node.name
 
         for socket in node.inputs:
-            if socket.name not in socket_names:
+            socket_name = socket.name
+            if socket_name not in socket_names:
                 continue
 
-            ref_soc = ref_inputs.get(socket.name, None)
+            is_linked = socket.is_linked
 
             # Does the socket count as modified (different from the
             # socket on a default reference node)
-            is_modified = (socket.is_linked
-                           or ref_soc is None
-                           or not ref_soc.default_values_equal(socket))
-
-            soc_value = _SocketInputValue.from_socket(socket, is_modified)
+            if is_linked:
+                is_modified = True
+            else:
+                if ref_inputs is None:
+                    ref_inputs = {x.name: x
+                                  for x in reference_inputs(node)
+                                  if x.name in socket_names}
+                ref_soc = ref_inputs.get(socket_name, None)
+                is_modified = (ref_soc is None
+                               or not ref_soc.default_values_equal(socket))
+
+            link = None
+            if is_linked and link_map is not None:
+                link = link_map.get((node_name, socket.identifier))
+
+            soc_value = _SocketInputValue.from_socket(socket, is_modified,
+                                                      link)
             socket_values.append(soc_value)
         return socket_values
 
@@ -296,8 +422,7 @@ class _ReplaceMaterialHelper:
                              modified: bool,
                              enabled: bool) -> List[_SocketInputValue]:
 
-        enabled_channels = {ch.name for ch in self.layer_stack.channels
-                            if ch.enabled}
+        enabled_channels = self._enabled_channel_names
 
         if modified:
             modified_filter = self._modified_filter_factory(socket_values)
@@ -306,23 +431,48 @@ class _ReplaceMaterialHelper:
                 if (modified and x.is_modified and modified_filter(x))
                 or (enabled and x.name in enabled_channels)]
 
-    def setup_layer_node_tree(self, node_tree: ShaderNodeTree) -> None:
+    @staticmethod
+    def _scan_nodes(node_tree: ShaderNodeTree
+                    ) -> Tuple[Optional[ShaderNode], Optional[ShaderNode],
+                               List[ShaderNode]]:
+        """Finds the first group input node, the first group output node
+        and all material output nodes of node_tree in a single pass
+        over its nodes.
+        """
+        group_in = None
+        group_out = None
+        ma_outputs = []
+
+        for node in node_tree.nodes:
+            bl_idname = node.bl_idname
+            if bl_idname == "ShaderNodeOutputMaterial":
+                ma_outputs.append(node)
+            elif bl_idname == "NodeGroupOutput":
+                if group_out is None:
+                    group_out = node
+            elif bl_idname == "NodeGroupInput":
+                if group_in is None:
+                    group_in = node
+        return group_in, group_out, ma_outputs
+
+    def setup_layer_node_tree(self, node_tree: ShaderNodeTree
+                              ) -> bpy.types.NodeGroupOutput:
         """Ensures the node group has an output node and sets
-        their locations.
+        their locations. Returns the group output node.
         """
+        group_in, group_out, ma_outputs = self._scan_nodes(node_tree)
 
         # Remove the group input node
-        group_in = get_node_by_type(node_tree, "NodeGroupInput")
         if group_in is not None:
             node_tree.nodes.remove(group_in)
 
         # Ensure that there's a group output node
-        group_out = get_node_by_type(node_tree, "NodeGroupOutput")
         if group_out is None:
             group_out = node_tree.nodes.new("NodeGroupOutput")
 
-        # The material output node
-        ma_output_node = get_output_node(node_tree)
+        # The material output node (the tree can only have one if the
+        # scan found any material output nodes)
+        ma_output_node = get_output_node(node_tree) if ma_outputs else None
         if ma_output_node is not None:
             # Set the group output's location to the same as the
             # material output
@@ -334,45 +484,64 @@ class _ReplaceMaterialHelper:
                 node_tree.nodes.remove(surface_shader)
 
         # Remove all material output nodes
-        for node in list(node_tree.nodes):
-            if isinstance(node, bpy.types.ShaderNodeOutputMaterial):
-                node_tree.nodes.remove(node)
+        for node in ma_outputs:
+            node_tree.nodes.remove(node)
+
+        return group_out
 
     def set_group_output_values(self,
                                 node_tree: ShaderNodeTree,
-                                socket_values: List[_SocketInputValue]
+                                socket_values: List[_SocketInputValue],
+                                group_out: Optional[ShaderNode] = None
                                 ) -> None:
         """Set the default_value of and link the input sockets of a
         NodeGroupOutput using the values given in socket_values.
+        If group_out is None then the first NodeGroupOutput found in
+        node_tree is used.
         """
 
-        group_out = get_node_by_type(node_tree, "NodeGroupOutput")
+        if group_out is None:
+            group_out = get_node_by_type(node_tree, "NodeGroupOutput")
 
+        output_names = {x.name for x in get_node_tree_sockets(node_tree,
+                                                              'OUTPUT')}
         for soc_value in socket_values:
-            if get_node_tree_socket(node_tree,
-                                    soc_value.name, 'OUTPUT') is None:
+            if soc_value.name not in output_names:
                 new_node_tree_socket(node_tree, soc_value.name,
                                      'OUTPUT', soc_value.type)
+                output_names.add(soc_value.name)
+
+        # Build the name lookups once all the outputs exist (keeping the
+        # first socket for any duplicate names as with subscripting)
+        tree_outs = {}
+        for tree_out in get_node_tree_sockets(node_tree, 'OUTPUT'):
+            tree_outs.setdefault(tree_out.name, tree_out)
+        group_out_inputs = {}
+        for group_out_soc in group_out.inputs:
+            group_out_inputs.setdefault(group_out_soc.name, group_out_soc)
+
+        links_new = node_tree.links.new
 
         for soc_value in socket_values:
-            group_out_soc = group_out.inputs[soc_value.name]
-            tree_out = get_node_tree_socket(node_tree,
-                                            soc_value.name, 'OUTPUT')
+            group_out_soc = group_out_inputs[soc_value.name]
+            tree_out = tree_outs[soc_value.name]
 
             if soc_value.default_value is not None:
                 group_out_soc.default_value = soc_value.default_value
                 tree_out.default_value = soc_value.default_value
             if soc_value.link_node_name:
-                node_tree.links.new(group_out_soc,
-                                    soc_value.get_linked_socket(node_tree))
+                links_new(group_out_soc,
+                          soc_value.get_linked_socket(node_tree))
 
     def add_all_layer_stack_channels(self, layer, enabled_only) -> None:
         layer_stack_chs = [ch for ch in self.layer_stack.channels
                            if not enabled_only or ch.enabled]
+        existing = {ch.name for ch in layer.channels}
         for ch in layer_stack_chs:
-            if ch.name not in layer.channels:
+            if ch.name not in existing:
                 layer_ch = layer.add_channel(ch)
                 layer_ch.enabled = ch.enabled
+                existing.add(ch.name)
 
 
 class _CombineMaterialHelper(_ReplaceMaterialHelper):
@@ -396,8 +565,10 @@ class _CombineMaterialHelper(_ReplaceMaterialHelper):
 
             # For other sockets use the default_value with a CombineXYZ node
             value_node = node_tree.nodes.new("ShaderNodeCombineXYZ")
-            for i, component in enumerate(socket.default_value):
-                value_node.inputs[i].default_value = component
+            # Read the whole array from the socket at once
+            for inp, component in zip(value_node.inputs,
+                                       tuple(socket.default_value)):
+                inp.default_value = component
 
         elif socket.type == 'VALUE':
             value_node = node_tree.nodes.new("ShaderNodeValue")
@@ -413,37 +584,46 @@ class _CombineMaterialHelper(_ReplaceMaterialHelper):
         value_node.label = socket.name
         return value_node, value_node.outputs[0]
 
-    def setup_combine_node_tree(self, node_tree: ShaderNodeTree) -> None:
+    def setup_combine_node_tree(self, node_tree: ShaderNodeTree
+                                ) -> bpy.types.NodeGroupOutput:
         """Setup a node tree to be combined with a material's existing
-        node tree.
+        node tree. Returns the node tree's group output node.
         """
 
         clear_node_tree_sockets(node_tree, 'OUTPUT')
 
+        _, group_out, ma_outputs = self._scan_nodes(node_tree)
+
         # Ensure that there's a group output node
-        group_out = get_node_by_type(node_tree, "NodeGroupOutput")
         if group_out is None:
             group_out = node_tree.nodes.new("NodeGroupOutput")
 
-        # The material output node
-        ma_output_node = get_output_node(node_tree)
+        # The material output node (the tree can only have one if the
+        # scan found any material output nodes)
+        ma_output_node = get_output_node(node_tree) if ma_outputs else None
         if ma_output_node is not None:
             # Replace the surface shader with reroute nodes etc.
-            surface_shader = self._get_surface_shader(ma_output_node)
+            link_map = _build_incoming_link_map(node_tree)
+            surface_shader = self._get_surface_shader(ma_output_node,
+                                                      link_map)
             if surface_shader is not None:
-                self._replace_surface_shader(surface_shader, group_out)
+                self._replace_surface_shader(surface_shader, group_out,
+                                             link_map)
 
         # Remove all material output nodes
-        for node in list(node_tree.nodes):
-            if isinstance(node, bpy.types.ShaderNodeOutputMaterial):
-                node_tree.nodes.remove(node)
+        for node in ma_outputs:
+            node_tree.nodes.remove(node)
+
+        return group_out
 
     def _replace_surface_shader(self,
                                 surface_shader: ShaderNode,
-                                group_out: ShaderNode):
+                                group_out: ShaderNode,
+                                link_map: Optional[_LinkMap] = None):
         """Replace the node surface_shader shader with reroute nodes
         and value nodes and connect the new nodes to Group Output
-        node group_out.
+        node group_out. link_map should be from
+        _build_incoming_link_map if given.
         """
         node_tree = surface_shader.id_data
 
@@ -451,13 +631,25 @@ class _CombineMaterialHelper(_ReplaceMaterialHelper):
         # channels' values
         channel_nodes: Dict[str: ShaderNode] = {}
 
+        if link_map is None:
+            link_map = _build_incoming_link_map(node_tree)
+        shader_name = surface_shader.name
+
+        shader_inputs = {}
+        for socket in surface_shader.inputs:
+            shader_inputs.setdefault(socket.name, socket)
+
+        output_names = {x.name for x in get_node_tree_sockets(node_tree,
+                                                              'OUTPUT')}
+
+        # Sockets of enabled channels in the layer stack's channel order
+        channel_sockets = [shader_inputs[ch.name]
+                           for ch in self.layer_stack.channels
+                           if ch.name in shader_inputs and ch.enabled]
+
         y_pos = surface_shader.location.y
         x_pos = surface_shader.location.y + surface_shader.width
-        for ch in self.layer_stack.channels:
-            if not ch.enabled or ch.name not in surface_shader.inputs:
-                continue
-
-            socket = surface_shader.inputs[ch.name]
+        for socket in channel_sockets:
 
             reroute = node_tree.nodes.new("NodeReroute")
             reroute.label = socket.name
@@ -466,7 +658,9 @@ class _CombineMaterialHelper(_ReplaceMaterialHelper):
             channel_nodes[socket.name] = reroute
 
             if socket.is_linked:
-                link = socket.links[0]
+                link = link_map.get((shader_name, socket.identifier))
+                if link is None:
+                    link = socket.links[0]
                 node_tree.links.new(reroute.inputs[0], link.from_socket)
 
             elif socket.type in ('VALUE', 'RGBA', 'VECTOR'):
@@ -483,9 +677,10 @@ class _CombineMaterialHelper(_ReplaceMaterialHelper):
             y_pos -= 20
 
             # Add a socket for the channel to the node group output
-            if get_node_tree_socket(node_tree, socket.name, 'OUTPUT') is None:
+            if socket.name not in output_names:
                 new_node_tree_socket(node_tree, socket.name, 'OUTPUT',
                                      socket.bl_rna.identifier)
+                output_names.add(socket.name)
 
             # Connect the reroute node to group_out
             group_out_soc = group_out.inputs[socket.name]
@@ -498,52 +693,75 @@ class _CombineMaterialHelper(_ReplaceMaterialHelper):
         containing the extracted nodes.
         """
         node_tree = group_node.id_data
+        nodes = node_tree.nodes
 
-        for node in node_tree.nodes:
-            node.select = (node == group_node)
-        node_tree.nodes.active = group_node
+        # Select only group_node
+        nodes.foreach_set("select", [False] * len(nodes))
+        group_node.select = True
+        nodes.active = group_node
 
         # Ungroup (expand) the group into node_tree
         with ExitStack() as exit_stack:
             _temp_switch_to_node_editor(bpy.context, exit_stack, node_tree)
             bpy.ops.node.group_ungroup()
 
-        frame = node_tree.nodes.new("NodeFrame")
+        # Read the selection state of all nodes at once (the new nodes
+        # are selected after ungrouping)
+        selected = [False] * len(nodes)
+        nodes.foreach_get("select", selected)
 
-        # Parent the new nodes (now selected) to frame
-        for node in node_tree.nodes:
-            if node.select and node.parent is None:
+        frame = nodes.new("NodeFrame")
+
+        # Parent the new nodes to frame. N.B. frame is after all the
+        # nodes in selected so zip skips it.
+        for node, is_sel in zip(nodes, selected):
+            if is_sel and node.parent is None:
                 node.parent = frame
         frame.select = True
 
         return frame
 
-    def position_frame(self, frame) -> None:
+    def position_frame(self, frame,
+                       group_out: Optional[ShaderNode] = None) -> None:
         """Positions the frame containing the new nodes from the combined
-        material.
+        material. group_out should be the group output node of the
+        frame's node tree (found automatically if None).
         """
         node_tree = frame.id_data
 
-        nodes_to_check = [x for x in node_tree.nodes if x.parent is None]
+        # Sort the nodes into top-level nodes and frame children in a
+        # single scan of the node tree.
+        nodes_to_check = []
+        nodes_in_frame = []
+        for node in node_tree.nodes:
+            parent = node.parent
+            if parent is None:
+                nodes_to_check.append(node)
+            elif parent == frame:
+                nodes_in_frame.append(node)
+
         bb = nodes_bounding_box(nodes_to_check)
 
-        group_out = get_node_by_type(node_tree, "NodeGroupOutput")
+        if group_out is None:
+            group_out = get_node_by_type(node_tree, "NodeGroupOutput")
 
         # TODO Improve positioning
 
-        nodes_in_frame = [x for x in node_tree.nodes if x.parent == frame]
         framebb = nodes_bounding_box(nodes_in_frame)
         frame.location.y = bb.bottom - framebb.height/2 - 200
         frame.location.x = group_out.location.x - framebb.width/2 - 200
 
-    def position_group(self, group_node) -> None:
+    def position_group(self, group_node,
+                       group_out: Optional[ShaderNode] = None) -> None:
         """Positions the Group node containing the added material's
-        node tree.
+        node tree. group_out should be the group output node of the
+        group node's node tree (found automatically if None).
         """
         node_tree = group_node.id_data
         nodes = node_tree.nodes
 
-        group_out = get_node_by_type(node_tree, "NodeGroupOutput")
+        if group_out is None:
+            group_out = get_node_by_type(node_tree, "NodeGroupOutput")
 
         group_node.location.x = group_out.location.x - 300
         group_node.location.y = group_out.location.y + 400
@@ -563,7 +781,8 @@ class _CombineMaterialHelper(_ReplaceMaterialHelper):
 def replace_layer_material(context,
                            layer,
                            material: Material,
-                           ch_select: str = 'MODIFIED_OR_ENABLED') -> None:
+                           ch_select: str = 'MODIFIED_OR_ENABLED',
+                           layer_stack=None) -> None:
     """Replaces the node tree of MaterialLayer 'layer' with a node
     group created from material.node_tree
     Params:
@@ -573,20 +792,35 @@ def replace_layer_material(context,
         material: A bpy.types.Material to copy the node tree from.
         ch_select: Which channels the layer should have. Enum str in
             {'ALL', 'ALL_ENABLED', 'MODIFIED_OR_ENABLED', 'MODIFIED_ONLY'}.
+        layer_stack: The layer's LayerStack (found from layer if None).
     """
     if context.space_data is None:
         raise ValueError("context has no space data.")
 
-    helper = _ReplaceMaterialHelper(layer, material)
+    helper = _ReplaceMaterialHelper(layer, material, layer_stack)
 
-    # Duplicate the material's node tree as a node group
-    node_tree = _duplicate_ma_node_tree(context, material)
+    ma_output_node = get_output_node(material.node_tree)
+
+    if helper.is_shader_only(material.node_tree, ma_output_node):
+        # Only the surface shader's values are needed so read them
+        # directly from the material and build a new node group with
+        # just a group output node rather than copying the node tree.
+        out_socket_values = helper.get_channel_socket_values(
+                                material.node_tree, ma_output_node)
+
+        node_tree = bpy.data.node_groups.new(material.name,
+                                             "ShaderNodeTree")
+        group_out = node_tree.nodes.new("NodeGroupOutput")
+        group_out.location = ma_output_node.location
+    else:
+        # Duplicate the material's node tree as a node group
+        node_tree = _duplicate_ma_node_tree(context, material)
 
-    # List of _SocketInputValue for each socket associated with a
-    # channel of the layer stack
-    out_socket_values = helper.get_channel_socket_values(node_tree)
+        # List of _SocketInputValue for each socket associated with a
+        # channel of the layer stack
+        out_socket_values = helper.get_channel_socket_values(node_tree)
 
-    helper.setup_layer_node_tree(node_tree)
+        group_out = helper.setup_layer_node_tree(node_tree)
 
     if ch_select != 'ALL':
         # Filter the socket values list based on ch_select
@@ -596,7 +830,7 @@ def replace_layer_material(context,
                 enabled=ch_select in ('ALL_ENABLED', 'MODIFIED_OR_ENABLED')
                 )
 
-    helper.set_group_output_values(node_tree, out_socket_values)
+    helper.set_group_output_values(node_tree, out_socket_values, group_out)
 
     layer.replace_node_tree(node_tree, update_channels=True)
 
@@ -606,7 +840,7 @@ def replace_layer_material(context,
         helper.add_all_layer_stack_channels(layer,
                                             enabled_only=ch_select != 'ALL')
 
-    sort_outputs_by(layer.node_tree, layer.layer_stack.channels)
+    sort_outputs_by(layer.node_tree, helper.layer_stack.channels)
 
 
 def combine_layer_material(context,
@@ -642,19 +876,19 @@ def combine_layer_material(context,
 
     if expand_group:
         frame = helper.expand_group_node(group_node)
-        helper.position_frame(frame)
+        helper.position_frame(frame, layer_output)
         frame.label = material.name
 
         bpy.data.node_groups.remove(node_tree)
     else:
-        helper.position_group(group_node)
+        helper.position_group(group_node, layer_output)
 
 
 class PML_UL_load_material_list(UIList):
-    _ma_compat_cache: Dict[str, bool] = {}
-
-    def _should_cache_compat(self, ma: Material) -> bool:
-        return ma.library is not None
+    # Cache of (layer stack identifier, material name_full) tuples to
+    # the material's compatibility with the layer stack. Cleared
+    # whenever materials may have changed (see add_material_cache).
+    _ma_compat_cache: Dict[Tuple[str, str], bool] = {}
 
     def draw_filter(self, _context, layout):
         layout.scale_y = 0.5
@@ -678,50 +912,51 @@ class PML_UL_load_material_list(UIList):
         helper = bpy.types.UI_UL_list
 
         shown_flag = self.bitflag_filter_item
-        assert isinstance(self.filter_name, str)
-
-        if self.filter_name:
-            flags = helper.filter_items_by_name(self.filter_name, shown_flag,
-                                                materials, "name")
-            if self.use_filter_invert:
-                # Will be switched again later
-                flags = [x ^ shown_flag for x in flags]
+        filter_name = self.filter_name
+        assert isinstance(filter_name, str)
+
+        # Only match names that don't match filter_name when inverted
+        invert_names = bool(filter_name) and self.use_filter_invert
+
+        if filter_name:
+            name_flags = helper.filter_items_by_name(filter_name, shown_flag,
+                                                     materials, "name")
         else:
-            flags = [shown_flag] * len(materials)
+            name_flags = None
+
+        # use_filter_invert automatically inverts the flags, but since
+        # the inversion is performed manually for the name filter each
+        # flag is toggled here to counter the automatic inversion.
+        invert_mask = shown_flag if self.use_filter_invert else 0
 
-        # FIXME Compatibility may have changed since material was cached
         compat_cache = self._ma_compat_cache
+        layer_stack_id = layer_stack.identifier
 
         # Should materials with names starting with "." be shown
-        show_hidden_materials = self.filter_name.startswith(".")
+        show_hidden_materials = filter_name.startswith(".")
+
+        flags = [invert_mask] * len(materials)
 
         for idx, ma in enumerate(materials):
-            if not flags[idx] & shown_flag:
-                continue
+            if name_flags is not None:
+                name_match = bool(name_flags[idx] & shown_flag)
+                if name_match == invert_names:
+                    continue
 
-            if ma.name.startswith(".") and not show_hidden_materials:
+            # N.B. name_full starts with the same character as name
+            name_full = ma.name_full
+            if not show_hidden_materials and name_full[:1] == ".":
                 # Hide hidden materials unless searching for them
-                flags[idx] &= ~shown_flag
                 continue
 
-            cached = compat_cache.get(ma.name_full, None)
-
-            if cached is None:
+            cache_key = (layer_stack_id, name_full)
+            compatible = compat_cache.get(cache_key)
+            if compatible is None:
                 compatible = check_material_compat(ma, layer_stack)
-                if self._should_cache_compat(ma):
-                    compat_cache[ma.name_full] = compatible
-            else:
-                compatible = cached
+                compat_cache[cache_key] = compatible
 
-            if not compatible:
-                flags[idx] &= ~shown_flag
-
-        # use_filter_invert automatically inverts the flags, but since
-        # the inversion was already performed manually after
-        # filter_items_by_name we toggle the flags here to counter the
-        # effects of the automatic inversion.
-        if self.use_filter_invert:
-            flags = [x ^ shown_flag for x in flags]
+            if compatible:
+                flags[idx] = shown_flag ^ invert_mask
 
         return flags, []  # flags, order
 
@@ -763,20 +998,35 @@ class ReplaceLayerMaOpBase:
         """Enable all channels in layer on both the layer_stack and
         the layer itself.
         """
+        layer_stack_chs = layer_stack.channels
+        base_layer_chs = layer_stack.base_layer.channels
+
         for ch in layer.channels:
-            layer_stack_ch = layer_stack.channels.get(ch.name)
+            name = ch.name
+            layer_stack_ch = layer_stack_chs.get(name)
+            if layer_stack_ch is None:
+                continue
 
-            if layer_stack_ch is not None:
-                layer_stack.set_channel_enabled(ch.name, True)
+            # Skip channels that are already fully enabled since
+            # set_channel_enabled may trigger updates.
+            if not layer_stack_ch.enabled or name not in base_layer_chs:
+                layer_stack.set_channel_enabled(name, True)
+            if not ch.enabled:
                 ch.enabled = True
 
-    def replace_layer_material(self, context, layer, material):
-        layer_stack = get_layer_stack(context)
+    def replace_layer_material(self, context, layer, material,
+                               layer_stack=None):
+        """Replace layer's material. layer_stack is taken from context
+        if not given.
+        """
+        if layer_stack is None:
+            layer_stack = get_layer_stack(context)
 
         layer.free_bake()
 
         replace_layer_material(context, layer, material,
-                               ch_select=self.ch_detect_mode)
+                               ch_select=self.ch_detect_mode,
+                               layer_stack=layer_stack)
 
         if (self.ch_detect_mode in ('MODIFIED_ONLY', 'MODIFIED_OR_ENABLED')
                 and self.auto_enable_channels):
@@ -866,7 +1116,8 @@ class PML_OT_replace_layer_material(ReplaceLayerMaOpBase, Operator):
             if material is None:
                 return {'CANCELLED'}
 
-            self.replace_layer_material(context, layer, material)
+            self.replace_layer_material(context, layer, material,
+                                        layer_stack)
 
             return {'FINISHED'}
 
@@ -942,11 +1193,12 @@ class ReplaceLayerMaOpAssetBrowser(ReplaceLayerMaOpBase):
         layer = layer_stack.active_layer
 
         with ExitStack() as self.exit_stack:
-            material = self._get_material(context)
+            material = self._get_material(context, layer_stack)
             if material is None:
                 return {'CANCELLED'}
 
-            self.replace_layer_material(context, layer, material)
+            self.replace_layer_material(context, layer, material,
+                                        layer_stack)
 
             self.update_op_remember()
             return {'FINISHED'}
@@ -967,34 +1219,60 @@ class ReplaceLayerMaOpAssetBrowser(ReplaceLayerMaOpBase):
         wm = context.window_manager
         return wm.invoke_props_dialog(self)
 
-    def _get_material(self, context) -> Optional[Material]:
-        if context.active_file is None:
-            return None
+    def _get_material(self, context, layer_stack=None,
+                      asset: Optional[asset_helper.AssetInfo] = None
+                      ) -> Optional[Material]:
+        # Look up the active asset (and layer stack) from context only
+        # once if they are not given
+        if asset is None:
+            asset = asset_helper.AssetInfo.from_active(context)
+            if asset is None:
+                return None
+
+        if layer_stack is None:
+            layer_stack = get_layer_stack(context)
 
-        local_id = asset_helper.asset_local_id(context)
+        local_id = asset.local_id
         if local_id is not None:
             ma = local_id
         else:
-            ma = self.import_material(context)
-
-        layer_stack = get_layer_stack(context)
+            ma = self.import_material(context, asset, layer_stack)
 
         if ma is None or not self.check_material_valid(ma, layer_stack):
             return None
         return ma
 
-    def import_material(self, context) -> Optional[Material]:
+    def import_material(self, context,
+                        asset: Optional[asset_helper.AssetInfo] = None,
+                        layer_stack=None) -> Optional[Material]:
+        """Appends a material asset, which is removed again when
+        self.exit_stack closes. asset and layer_stack are taken from
+        context if not given.
+        """
         if self.exit_stack is None:
             raise RuntimeError("self.exit_stack is None.")
 
+        if asset is None:
+            asset = asset_helper.AssetInfo.from_active(context)
+            if asset is None:
+                return None
+        if layer_stack is None:
+            layer_stack = get_layer_stack(context)
+
+        # Don't append assets already known to be incompatible
+        cached = get_cached_asset_compat(asset, layer_stack)
+        if cached is not None and not cached and not cached.in_progress:
+            self.report({'WARNING'}, cached.reason)
+            return None
+
         try:
-            ma = asset_helper.append_active_material_asset(context)
+            ma = asset_helper.append_material_asset(asset)
         except NotImplementedError:
             self.report({'ERROR'}, "Replacing the layer material with an "
                                    "asset is not supported for this version.")
             return None
 
-        self.exit_stack.callback(lambda: remove_appended_material(ma))
+        self.exit_stack.callback(remove_appended_material, ma)
 
         return ma
 
@@ -1040,14 +1318,17 @@ class PML_OT_new_layer_material_ab(ReplaceLayerMaOpAssetBrowser, Operator):
         # super().execute to replace the material.
 
         with ExitStack() as self.exit_stack:
-            material = self._get_material(context)
+            material = self._get_material(context, layer_stack)
             if material is None:
                 return {'CANCELLED'}
 
-            new_layer = layer_stack.insert_layer(material.name or "Layer", -1)
+            ma_name = material.name or "Layer"
+
+            new_layer = layer_stack.insert_layer(ma_name, -1)
 
             try:
-                self.replace_layer_material(context, new_layer, material)
+                self.replace_layer_material(context, new_layer, material,
+                                            layer_stack)
             except Exception as e:
                 layer_stack.remove_layer(new_layer)
                 raise e
@@ -1077,9 +1358,8 @@ class PML_OT_combine_material_ab(ReplaceLayerMaOpAssetBrowser, Operator):
         default=False
     )
 
-    def draw(self, context):
+    def draw(self, _context):
         layout = self.layout
-        layer_stack = get_layer_stack(context)
 
         layout.prop(self, "keep_as_node_group")
 
@@ -1087,12 +1367,9 @@ class PML_OT_combine_material_ab(ReplaceLayerMaOpAssetBrowser, Operator):
         flow = layout.grid_flow(columns=2, even_columns=True, align=True)
 
         # Show a bool prop for each channel in the material that is
-        # also enabled on the layer stack
-        layer_stack_chs = [x for x in layer_stack.channels if x.enabled]
-        for layer_stack_ch in layer_stack_chs:
-            ch = self.channels.get(layer_stack_ch.name)
-            if ch is not None:
-                flow.prop(ch, "enabled", text=ch.name)
+        # also enabled on the layer stack (filtered by _populate_channels)
+        for ch in self.channels:
+            flow.prop(ch, "enabled", text=ch.name)
 
     def execute(self, context):
         layer_stack = get_layer_stack(context)
@@ -1103,7 +1380,10 @@ class PML_OT_combine_material_ab(ReplaceLayerMaOpAssetBrowser, Operator):
             return {'CANCELLED'}
 
         with ExitStack() as self.exit_stack:
-            material = self._get_material(context)
+            material = self._get_material(context, layer_stack)
+            if material is None:
+                return {'CANCELLED'}
+
             combine_layer_material(context,
                                    layer_stack.active_layer,
                                    material,
@@ -1115,30 +1395,58 @@ class PML_OT_combine_material_ab(ReplaceLayerMaOpAssetBrowser, Operator):
     def invoke(self, context, _event):
         layer_stack = get_layer_stack(context)
 
-        with ExitStack() as self.exit_stack:
-            material = self._get_material(context)
+        asset = asset_helper.AssetInfo.from_active(context)
+        if asset is None:
+            return {'CANCELLED'}
 
-            if material is None:
-                return {'CANCELLED'}
-            if material.node_tree is None:
-                self.report({'WARNING'},
-                            f"{material.name} does not use nodes")
+        if asset.local_id is not None:
+            # Local materials are not appended so need no clean up
+            if not self._populate_from_asset(context, layer_stack, asset):
                 return {'CANCELLED'}
-
-            self._populate_channels(layer_stack, material)
+        else:
+            with ExitStack() as self.exit_stack:
+                if not self._populate_from_asset(context, layer_stack,
+                                                 asset):
+                    return {'CANCELLED'}
 
         wm = context.window_manager
         return wm.invoke_props_dialog(self)
 
+    def _populate_from_asset(self, context, layer_stack,
+                             asset: asset_helper.AssetInfo) -> bool:
+        """Populate this operator's channels property from the material
+        asset asset. Returns False if the material cannot be used.
+        """
+        material = self._get_material(context, layer_stack, asset)
+
+        if material is None:
+            return False
+        if material.node_tree is None:
+            self.report({'WARNING'}, f"{material.name} does not use nodes")
+            return False
+
+        self._populate_channels(layer_stack, material)
+        return True
+
     def _populate_channels(self, layer_stack, ma: Material) -> None:
-        """Populate this operator's channels property from material ma."""
-        helper = _ReplaceMaterialHelper(layer_stack.active_layer, ma)
+        """Populate this operator's channels property from material ma.
+        Only channels enabled on layer_stack are added (in the same
+        order as layer_stack's channels).
+        """
+        helper = _ReplaceMaterialHelper(layer_stack.active_layer, ma,
+                                        layer_stack)
         socket_values = helper.get_channel_socket_values(ma.node_tree)
+        socket_names = {x.name for x in socket_values}
 
-        for soc_value in socket_values:
-            new_ch = self.channels.add()
-            new_ch.name = soc_value.name  # Only need the socket name
-            new_ch.enabled = False
+        names = [ch.name for ch in layer_stack.channels
+                 if ch.name in socket_names and ch.enabled]
+
+        channels = self.channels
+        for name in names:
+            channels.add().name = name
+
+        # Initially disable all the channels in a single call
+        channels.foreach_set("enabled", [False] * len(channels))
 
 
 classes = (PML_UL_load_material_list,
@@ -1157,8 +1465,12 @@ def register():
     bpy.types.WindowManager.pml_ma_assets = CollectionProperty(
                                               type=bpy.types.AssetHandle)
 
+    add_material_cache(PML_UL_load_material_list._ma_compat_cache.clear)
+
 
 def unregister():
+    remove_material_cache(PML_UL_load_material_list._ma_compat_cache.clear)
+
     del bpy.types.WindowManager.pml_ma_assets
 
     _unregister()
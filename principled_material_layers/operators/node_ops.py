@@ -18,7 +18,7 @@ from .. import tiled_storage
 from .. import utils
 from ..utils.layer_stack_utils import get_layer_stack
 from ..utils.node_tree import ensure_outputs_match_channels
-from ..utils.ops import pml_op_poll
+from ..utils.ops import pml_op_poll, pml_op_poll_layer_stack
 from ..utils.temp_changes import TempNodes
 
 
@@ -502,11 +502,12 @@ class PML_OT_add_to_tiled_storage(Operator):
 
     @classmethod
     def poll(cls, context):
-        if (not pml_op_poll(context)
+        layer_stack = pml_op_poll_layer_stack(context)
+        if (layer_stack is None
                 or not getattr(context, "selected_nodes", None)):
             return False
 
-        return tiled_storage.tiled_storage_enabled(get_layer_stack(context))
+        return tiled_storage.tiled_storage_enabled(layer_stack)
 
     def execute(self, context):
         img_nodes = [x for x in context.selected_nodes
@@ -10,7 +10,10 @@ from bpy_extras.io_utils import ImportHelper
 from .. import tiled_storage
 
 from ..utils.layer_stack_utils import get_layer_stack
-from ..utils.ops import ensure_global_undo, pml_op_poll, save_all_modified
+from ..utils.ops import (ensure_global_undo,
+                         pml_op_poll,
+                         pml_op_poll_layer_stack,
+                         save_all_modified)
 
 
 class PML_OT_select_udim_dir(Operator, ImportHelper):
@@ -114,10 +117,10 @@ class PML_OT_remove_udim_layout_tile(Operator):
 
     @classmethod
     def poll(cls, context):
-        if not pml_op_poll(context):
+        layer_stack = pml_op_poll_layer_stack(context)
+        if layer_stack is None:
             return False
-        im = get_layer_stack(context).image_manager
-        return im.udim_layout.active_tile is not None
+        return layer_stack.image_manager.udim_layout.active_tile is not None
 
     def execute(self, context):
         save_all_modified()
@@ -145,10 +148,11 @@ class PML_OT_add_to_tiled_storage(Operator):
     @classmethod
     def poll(cls, context):
         active_node = getattr(context, "active_node", None)
-        return (pml_op_poll(context)
-                and active_node is not None
-                and isinstance(active_node, bpy.types.ShaderNodeTexImage)
-                and get_layer_stack(context).image_manager.uses_tiled_storage)
+        if not isinstance(active_node, bpy.types.ShaderNodeTexImage):
+            return False
+        layer_stack = pml_op_poll_layer_stack(context)
+        return (layer_stack is not None
+                and layer_stack.image_manager.uses_tiled_storage)
 
     def execute(self, context):
         layer_stack = get_layer_stack(context)
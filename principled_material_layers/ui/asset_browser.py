@@ -1,5 +1,7 @@
 # SPDX-License-Identifier: GPL-2.0-or-later
 
+from typing import Optional
+
 import bpy
 
 from bpy_extras.asset_utils import SpaceAssetInfo
@@ -18,6 +20,10 @@ class PML_PT_asset_browser_panel(bpy.types.Panel):
     bl_region_type = 'TOOL_PROPS'
     bl_options = set()
 
+    # Whether the add-on preferences are a real AddonPreferences
+    # instance (so can be drawn). Set on the first draw.
+    _prefs_drawable: Optional[bool] = None
+
     @classmethod
     def poll(cls, context):
         if not SpaceAssetInfo.is_asset_browser(context.space_data):
@@ -36,7 +42,11 @@ class PML_PT_asset_browser_panel(bpy.types.Panel):
         layer_stack = get_layer_stack(context)
         active_layer = layer_stack.active_layer
 
-        if isinstance(prefs, bpy.types.AddonPreferences):
+        cls = type(self)
+        if cls._prefs_drawable is None:
+            cls._prefs_drawable = isinstance(prefs,
+                                             bpy.types.AddonPreferences)
+        if cls._prefs_drawable:
             layout.prop(prefs, "check_assets_compat", text="Check Compatible")
 
         if prefs.check_assets_compat:
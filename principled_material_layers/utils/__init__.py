@@ -1,6 +1,6 @@
 # SPDX-License-Identifier: GPL-2.0-or-later
 
-from ..import_utils import import_all
+from ..import_utils import import_all, register_all, unregister_all
 
 submodule_names = ("naming",
                    "ops",
@@ -17,3 +17,11 @@ submodule_names = ("naming",
 _submodules = import_all(submodule_names, __name__)
 
 globals().update(zip(submodule_names, _submodules))
+
+
+def register():
+    register_all(_submodules)
+
+
+def unregister():
+    unregister_all(_submodules)
@@ -1,7 +1,5 @@
 # SPDX-License-Identifier: GPL-2.0-or-later
 
-import collections
-
 from typing import Optional
 
 import bpy
@@ -147,24 +145,25 @@ def duplicate_node_tree(node_tree: ShaderNodeTree) -> ShaderNodeTree:
     # Ensure parent nodes are processed first
     from_nodes = sorted(node_tree.nodes, key=_num_ancestors)
 
+    # Dict of the names of nodes in node_tree to their copies
+    node_map = {}
     for node in from_nodes:
         new_node = to_tree.nodes.new(node.bl_idname)
         _copy_node_props(node, new_node)
+        node_map[node.name] = new_node
 
-    # DefaultDict of node names to a list of links to their input sockets
-    input_links_cache = collections.defaultdict(list)
+    # Copy the links in a single pass using node_map to find the nodes
     for link in node_tree.links:
-        input_links_cache[link.to_node.name].append(link)
-
-    for new_node in to_tree.nodes:
-        for link in input_links_cache[new_node.name]:
-            from_node = to_tree.nodes[link.from_node.name]
-            from_socket = _get_matching_socket(link.from_socket,
-                                               from_node.outputs)
+        from_node = node_map.get(link.from_node.name)
+        to_node = node_map.get(link.to_node.name)
+        if from_node is None or to_node is None:
+            continue
 
-            to_socket = _get_matching_socket(link.to_socket, new_node.inputs)
-            if to_socket is not None and from_socket is not None:
-                to_tree.links.new(to_socket, from_socket)
+        from_socket = _get_matching_socket(link.from_socket,
+                                           from_node.outputs)
+        to_socket = _get_matching_socket(link.to_socket, to_node.inputs)
+        if to_socket is not None and from_socket is not None:
+            to_tree.links.new(to_socket, from_socket)
 
     # TODO node_tree.animation_data?
     return to_tree
@@ -253,14 +253,19 @@ def save_image_copy(image: Image, filepath: str,
         image.save_render(filepath)
 
 
-def get_image_pixels(image: Image) -> Union[array, "numpy.ndarray"]:
-    img_size = len(image.pixels)
-
+def new_pixel_array(size: int) -> Union[array, "numpy.ndarray"]:
+    """Returns a float array of length size suitable for use with
+    Image.pixels.foreach_get/foreach_set. The array is a numpy array
+    if using numpy otherwise a python array.
+    """
     if _use_numpy():
         import numpy as np
-        px_array = np.empty(img_size, dtype=np.float32)
-    else:
-        px_array = array('f', [0.0])*img_size
+        return np.empty(size, dtype=np.float32)
+    return array('f', [0.0])*size
+
+
+def get_image_pixels(image: Image) -> Union[array, "numpy.ndarray"]:
+    px_array = new_pixel_array(len(image.pixels))
 
     image.pixels.foreach_get(px_array)
     return px_array
@@ -376,8 +381,7 @@ def copy_image(from_img: Image, to_img: Image) -> None:
         _copy_tiled_image(from_img, to_img)
         return
 
-    if (from_img.size[0] != to_img.size[0]
-            or from_img.size[1] != to_img.size[0]):
+    if tuple(from_img.size) != tuple(to_img.size):
         raise ValueError("Images must have the same size.")
 
     img_size = len(from_img.pixels)
@@ -385,11 +389,9 @@ def copy_image(from_img: Image, to_img: Image) -> None:
     if len(to_img.pixels) != img_size:
         raise ValueError("Image pixel data must be the same length.")
 
-    if _use_numpy():
-        import numpy as np
-        px_array = np.empty(img_size, dtype=np.float32)
-    else:
-        px_array = array('f', [0.0])*img_size
+    # Uses a numpy float32 array when numpy is enabled so that
+    # foreach_get/foreach_set can copy the buffer directly
+    px_array = new_pixel_array(img_size)
 
     from_img.pixels.foreach_get(px_array)
     to_img.pixels.foreach_set(px_array)
@@ -7,10 +7,11 @@ import itertools as it
 
 from collections import defaultdict
 from dataclasses import dataclass
-from typing import Callable, DefaultDict, Dict, Optional
+from typing import Callable, DefaultDict, Dict, List, Optional, Tuple
 
 import bpy
 
+from bpy.app.handlers import persistent
 from bpy.types import Material
 
 from .. import asset_helper
@@ -19,18 +20,27 @@ from .layer_stack_utils import get_layer_stack_by_id
 from ..utils.nodes import get_output_node
 
 _LayerStackID = str
-_AssetStrKey = str
 
-_CompatCache = Dict[_AssetStrKey, bool]
+# (library path, relative path) for assets or ("", name_full) for
+# assets with a local ID
+_AssetKey = Tuple[str, str]
+
+_CompatCache = Dict[_AssetKey, bool]
 
 _asset_compat_caches: DefaultDict[_LayerStackID,
                                   _CompatCache] = defaultdict(dict)
 
+# Functions that clear caches of data derived from local materials.
+# Called by clear_material_caches.
+_material_cache_clear_funcs: List[Callable[[], None]] = []
+
 
-def _asset_cache_key(asset: asset_helper.AssetInfo) -> _AssetStrKey:
+def _asset_cache_key(asset: asset_helper.AssetInfo) -> _AssetKey:
+    # N.B. Include the library path since assets in different
+    # libraries can have the same relative path.
     if asset.local_id is not None:
-        return asset.local_id.name_full
-    return asset.relative_path
+        return ("", asset.local_id.name_full)
+    return (asset.full_library_path, asset.relative_path)
 
 
 def _get_cached_asset_compat(asset, layer_stack) -> IsMaterialCompat:
@@ -45,6 +55,16 @@ def _set_cached_asset_compat(asset,
     cache[_asset_cache_key(asset)] = value
 
 
+def get_cached_asset_compat(asset: asset_helper.AssetInfo,
+                            layer_stack) -> Optional[IsMaterialCompat]:
+    """Returns the cached compatibility of a material asset with
+    layer_stack without checking it. Returns None if the asset has not
+    been checked. N.B. The compatibility of local assets is never
+    cached.
+    """
+    return _get_cached_asset_compat(asset, layer_stack)
+
+
 def del_cached_asset_compat(asset, layer_stack) -> None:
     cache = _asset_compat_caches[layer_stack.identifier]
     cache.pop(_asset_cache_key(asset), None)
@@ -217,13 +237,14 @@ def check_material_asset_compat(asset: asset_helper.AssetInfo,
         except OSError as e:
             is_compat = IsMaterialCompat(f"Error: {e}")
             _set_cached_asset_compat(asset, layer_stack, is_compat)
+            return is_compat
 
         except Exception as e:
             is_compat = IsMaterialCompat(f"Error: {e}")
             _set_cached_asset_compat(asset, layer_stack, is_compat)
             raise e
 
-        exit_stack.callback(lambda: remove_appended_material(ma))
+        exit_stack.callback(remove_appended_material, ma)
 
         is_compat = check_material_compat(ma, layer_stack)
         _set_cached_asset_compat(asset, layer_stack, is_compat)
@@ -238,6 +259,7 @@ class _FakeAsset:
     errors/crashes due to reallocation.
     """
     def __init__(self, asset):
+        self.full_library_path = asset.full_library_path
         self.relative_path = asset.relative_path
         self.local_id = None
 
@@ -305,3 +327,59 @@ def remove_appended_material(ma: Material) -> None:
 
     if lib is not None and not lib.users_id:
         bpy.data.libraries.remove(lib)
+
+
+def add_material_cache(clear_func: Callable[[], None]) -> None:
+    """Adds a function that clears a cache of data derived from local
+    materials. clear_func is called after a file is loaded, after undo
+    or redo, and after a material is edited.
+    """
+    if clear_func not in _material_cache_clear_funcs:
+        _material_cache_clear_funcs.append(clear_func)
+
+
+def remove_material_cache(clear_func: Callable[[], None]) -> None:
+    """Removes a function added with add_material_cache."""
+    if clear_func in _material_cache_clear_funcs:
+        _material_cache_clear_funcs.remove(clear_func)
+
+
+def clear_material_caches() -> None:
+    """Calls every function added with add_material_cache."""
+    for clear_func in _material_cache_clear_funcs:
+        clear_func()
+
+
+@persistent
+def _clear_material_caches_handler(*_args) -> None:
+    clear_material_caches()
+
+
+@persistent
+def _depsgraph_update_post_handler(_scene, depsgraph) -> None:
+    # Paint strokes also update the materials that use the painted
+    # image, so ignore material updates that come with image updates.
+    if (depsgraph.id_type_updated('MATERIAL')
+            and not depsgraph.id_type_updated('IMAGE')):
+        clear_material_caches()
+
+
+_clear_handler_lists = ("load_post", "undo_post", "redo_post")
+
+
+def register():
+    for name in _clear_handler_lists:
+        getattr(bpy.app.handlers, name).append(_clear_material_caches_handler)
+    bpy.app.handlers.depsgraph_update_post.append(
+        _depsgraph_update_post_handler)
+
+
+def unregister():
+    handlers = bpy.app.handlers
+    for name in _clear_handler_lists:
+        handler_list = getattr(handlers, name)
+        if _clear_material_caches_handler in handler_list:
+            handler_list.remove(_clear_material_caches_handler)
+
+    if _depsgraph_update_post_handler in handlers.depsgraph_update_post:
+        handlers.depsgraph_update_post.remove(_depsgraph_update_post_handler)
@@ -301,5 +301,15 @@ def sort_outputs_by(node_tree: NodeTree,
     sockets_sorted = sorted(sockets,
                             key=lambda x: ref_indices.get(x.name, len_refs))
 
+    # Track the current order of the sockets (by name) so that sockets
+    # already in the correct position are not moved.
+    current = [x.name for x in sockets]
+
     for target_idx, socket in enumerate(sockets_sorted):
+        name = socket.name
+        if current[target_idx] == name:
+            continue
         move_node_tree_socket(node_tree, socket, target_idx)
+
+        current.remove(name)
+        current.insert(target_idx, name)
@@ -148,7 +148,9 @@ def get_output_node(node_tree: ShaderNodeTree) -> Node:
 def get_nodes_by_type(node_tree: NodeTree,
                       node_type: Union[str, type]) -> Iterator[Node]:
     """Returns an iterator over all nodes of the given type in
-    node_tree.
+    node_tree. node_type may be a node type or a bl_idname string
+    (which is faster to compare). The nodes are found lazily so no
+    intermediate list is created.
     """
     if isinstance(node_type, str):
         return (x for x in node_tree.nodes if x.bl_idname == node_type)
@@ -171,8 +173,8 @@ def get_closest_node_of_type(closest_to: Node,
     node_tree = closest_to.id_data
 
     if group_tree:
-        nodes = [x for x in get_nodes_by_type(node_tree, node_type)
-                 if x.node_tree is group_tree]
+        nodes = (x for x in get_nodes_by_type(node_tree, node_type)
+                 if x.node_tree is group_tree)
     else:
         nodes = get_nodes_by_type(node_tree, node_type)
 
@@ -293,27 +295,24 @@ def nodes_bounding_box(nodes: Collection[Node]) -> Rect:
     if not nodes:
         return Rect(0, 0, 0, 0)
 
-    box = None
+    # Read each node's location and dimensions once, then let min/max
+    # do the reductions.
+    lefts = []
+    tops = []
+    rights = []
+    bottoms = []
 
     for node in nodes:
         left, top = node.location
         width, height = node.dimensions
-        right = left + width
-        bottom = top - height
-
-        if box is None:
-            box = Rect(left, top, width, height)
-            continue
-
-        if left < box.left:
-            box.left = left
-        elif right > box.right:
-            box.right = right
-        if top > box.top:
-            box.top = top
-        elif bottom < box.bottom:
-            box.bottom = bottom
-    return box
+        lefts.append(left)
+        tops.append(top)
+        rights.append(left + width)
+        bottoms.append(top - height)
+
+    left = min(lefts)
+    top = max(tops)
+    return Rect(left, top, max(rights) - left, top - min(bottoms))
 
 
 def set_node_group_vector_defaults(node_group: ShaderNodeTree):
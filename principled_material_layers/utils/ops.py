@@ -63,30 +63,47 @@ def pml_is_supported_editor(context: Context) -> bool:
     return False
 
 
-def pml_op_poll(context: Context) -> bool:
-    """Returns True if currently in a supported editor with an active
-    layer stack. This is the most common poll function for the
-    operators in this addon.
+def pml_op_poll_layer_stack(context: Context):
+    """Same as pml_op_poll but returns the active layer stack (or None
+    if the poll fails) so that callers don't need to call
+    get_layer_stack afterwards.
     """
-    layer_stack = get_layer_stack(context)
-    if layer_stack is None or not layer_stack.is_initialized:
-        return False
+    # Same lookup as get_layer_stack, but keep the material for later
+    obj = context.active_object
+    if obj is None:
+        return None
+    ma = obj.active_material
+    if ma is None:
+        return None
+    layer_stack = ma.pml_layer_stack
+    if not layer_stack.is_initialized:
+        return None
 
     space = context.space_data
 
     if space is None:
-        return True
-    if space.type == 'VIEW_3D' and context.mode == 'PAINT_TEXTURE':
-        return True
-    if space.type == 'NODE_EDITOR':
+        return layer_stack
+
+    space_type = space.type
+    if space_type == 'VIEW_3D':
+        return layer_stack if context.mode == 'PAINT_TEXTURE' else None
+    if space_type == 'NODE_EDITOR':
         edit_tree = space.edit_tree
         if edit_tree is None or space.shader_type != 'OBJECT':
-            return False
+            return None
 
-        ma_tree = layer_stack.material.node_tree
+        ma_tree = ma.node_tree
         if edit_tree == ma_tree or space.path[0].node_tree == ma_tree:
-            return True
-    return False
+            return layer_stack
+    return None
+
+
+def pml_op_poll(context: Context) -> bool:
+    """Returns True if currently in a supported editor with an active
+    layer stack. This is the most common poll function for the
+    operators in this addon.
+    """
+    return pml_op_poll_layer_stack(context) is not None
 
 
 @contextlib.contextmanager